@@ -1,25 +1,36 @@
 # archive_cli.py
+import asyncio
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import requests
 import typer
+from requests.adapters import HTTPAdapter
 from rich import box, print
 from rich.table import Table
 
-from tools.rclone_io import ensure_path, list_folders, move_local_to_remote
+from tools.fast_router import DEFAULT_THRESHOLD, try_rule_route
+from tools.rclone_io import (
+    aensure_path,
+    ensure_path,
+    list_folders,
+    move_local_to_remote,
+    move_many_local_to_remote,
+)
 from tools.text_read import read_text_any
-from tools.util import slugify, today
+from tools.util import rank_folders, slugify, today
 
 app = typer.Typer(add_completion=False)
 
+# Shared keep-alive session for Ollama so repeated calls reuse the socket
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+_SESSION.headers.update({"Connection": "keep-alive"})
 
-def call_llm(system_prompt: str, user_payload: dict) -> dict:
-    import json
-    import os
-
-    import requests
 
+def call_llm(system_prompt: str, user_payload: dict) -> dict:
     model = os.getenv("OLLAMA_MODEL", "llama3.1:8b")
 
     prompt = f"""[SYSTEM]
@@ -36,12 +47,145 @@ def call_llm(system_prompt: str, user_payload: dict) -> dict:
         "options": {"temperature": 0},
         "stream": False
     }
-    r = requests.post("http://127.0.0.1:11434/api/generate", json=payload, timeout=300)
+    r = _SESSION.post("http://127.0.0.1:11434/api/generate", json=payload, timeout=300)
     r.raise_for_status()
     data = r.json()
 
     txt = data.get("response", "").strip()
-    return json.loads(txt)
+    return _expand(json.loads(txt), _KEY_MAP)
+
+
+# Scoring rules shared by the single-file and batched prompts
+_RULES = """You are ARCHIVE, a pragmatic filing assistant. Given a document's extracted text and a list of OneDrive folders (relative paths), infer:
+- doc type (invoice|contract|homework|other),
+- year (int or null),
+- up to 8 keywords.
+Score folders by:
++2 if path implies type (contains 'invoice', 'homeworks', 'tickets' etc. as path segments),
++1 if year appears as a path segment,
++2 per keyword overlap (cap 3).
+"""
+
+# Compact result keys keep prefill/decode short; _expand maps them back
+_KEY_MAP = {
+    "i": "inferred",
+    "t": "type",
+    "v": "vendor",
+    "u": "subject",
+    "y": "year",
+    "k": "keywords",
+    "c": "candidates",
+    "p": "path",
+    "s": "score",
+    "w": "why",
+    "f": "proposed_filename",
+    "ch": "chosen_folder",
+}
+
+_RESULT_SCHEMA = """{"i":{"t":"...","v":"...","u":"...","y":2025,"k":[]},"c":[{"p":"...","s":0,"w":"..."},{"p":"...","s":0,"w":"..."},{"p":"...","s":0,"w":"..."}],"ch":"..."|null,"f":"YYYY-MM-DD_<type|doc>_<vendor|subject>_<orig>.ext"}"""
+
+_RESULT_RULES = """Keys: i=inferred (t=type, v=vendor, u=subject, y=year, k=keywords), c=candidates (p=path, s=score, w=why), ch=chosen folder, f=proposed filename.
+If auto=false, ch must be null. Do not invent folders; use only provided list.
+If vendor or year are unknown, set them to null.
+Return c sorted by descending s (best first).
+"""
+
+SYSTEM_PROMPT = _RULES + f"""Return strict one-line JSON using exactly these compact keys:
+{_RESULT_SCHEMA}
+{_RESULT_RULES}"""
+
+BATCH_SYSTEM_PROMPT = _RULES + f"""You receive several documents in "items"; handle each one independently.
+Return strict one-line JSON with exactly one result per item, echoing its "id", each result using the compact keys:
+{{"results":[{{"id":0,...}}]}} where each result is {_RESULT_SCHEMA} plus "id".
+{_RESULT_RULES}"""
+
+
+def _expand(obj, key_map: dict):
+    """
+    Recursively rename compact dict keys (see _KEY_MAP); unknown keys are kept.
+    """
+    if isinstance(obj, dict):
+        return {key_map.get(k, k): _expand(v, key_map) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_expand(v, key_map) for v in obj]
+    return obj
+
+
+def _normalize_result(result: dict) -> dict:
+    """
+    Coerce a raw LLM result into the response shape used by the CLI.
+    """
+    resp = {
+        "inferred": result.get("inferred", {}) or {},
+        "candidates": result.get("candidates", []) or [],
+        "proposed_filename": result.get("proposed_filename"),
+        "chosen_folder": result.get("chosen_folder"),
+    }
+
+    # ensure scores are ints and sort descending
+    for c in resp["candidates"]:
+        try:
+            c["score"] = int(c.get("score", 0))
+        except Exception:
+            c["score"] = 0
+
+    resp["candidates"] = sorted(resp["candidates"], key=lambda x: x.get("score", 0), reverse=True)
+    return resp
+
+
+# Rough chars-per-token for Llama-style BPE vocabularies on mixed prose/paths
+_CHARS_PER_TOKEN = 4
+# Allowance per document for payload keys, filename/path and chat framing
+_PAYLOAD_OVERHEAD_TOKENS = 100
+# Floors below which the LLM has too little to go on (~1000 chars of text per
+# document, a few dozen folders); these win over the budget
+_MIN_TEXT_TOKENS = 250
+_MIN_FOLDER_TOKENS = 400
+
+
+def _n_tokens(s: str) -> int:
+    return -(-len(s) // _CHARS_PER_TOKEN)
+
+
+def _pack_prompt(
+    texts: list[str], folders: list[str], budget_tokens: int, system_prompt: str
+) -> tuple[list[str], list[str]]:
+    """
+    Fit the documents' text and a folder shortlist into roughly `budget_tokens`.
+    Text gets half of what is left after the system prompt (split evenly
+    between documents); folders, best keyword match first, fill the rest.
+    Each document keeps at least _MIN_TEXT_TOKENS and the folder list at least
+    _MIN_FOLDER_TOKENS, overshooting the budget (with a warning) if needed.
+    """
+    room = budget_tokens - _n_tokens(system_prompt) - _PAYLOAD_OVERHEAD_TOKENS * len(texts)
+    per_text = max(room // (2 * len(texts)), _MIN_TEXT_TOKENS) * _CHARS_PER_TOKEN
+    texts = [t[:per_text] for t in texts]
+    room -= sum(_n_tokens(t) for t in texts)
+    if room < _MIN_FOLDER_TOKENS:
+        print(
+            f"[yellow]Warning:[/yellow] --prompt-budget {budget_tokens} is too small for "
+            f"{len(texts)} document(s); exceeding it to keep enough text and folders."
+        )
+        room = _MIN_FOLDER_TOKENS
+
+    query = "\n".join(t[:2000] for t in texts)
+    packed = []
+    for f in rank_folders(query, folders, k=len(folders), scan_chars=len(query)):
+        cost = _n_tokens(json.dumps(f, ensure_ascii=False)) + 1  # quoted entry + separator
+        if cost > room:
+            break
+        packed.append(f)
+        room -= cost
+    return texts, packed
+
+
+def _max_batch(budget_tokens: int, system_prompt: str) -> int:
+    """
+    Most documents one request can hold while each keeps _MIN_TEXT_TOKENS of
+    text and the folder list keeps _MIN_FOLDER_TOKENS.
+    """
+    room = budget_tokens - _n_tokens(system_prompt) - _MIN_FOLDER_TOKENS
+    return max(room // (_PAYLOAD_OVERHEAD_TOKENS + _MIN_TEXT_TOKENS), 1)
 
 
 def smart_filename(inferred: dict, orig_name: str, date_str: str) -> str:
@@ -66,6 +210,18 @@ def route(
         False, "--allow-create", help="Create missing folders if needed."
     ),
     max_text_chars: int = typer.Option(4000, help="Truncate extracted text."),
+    ocr_pages: int = typer.Option(
+        1, min=1, help="Pages to OCR for scanned PDFs (several are OCR'd in parallel)."
+    ),
+    prompt_budget: int = typer.Option(
+        3500, help="Approximate prompt size in tokens; best-matching folders fill the remainder."
+    ),
+    force_llm: bool = typer.Option(
+        False, "--force-llm", help="Always ask the LLM, even when keyword rules are confident."
+    ),
+    rule_threshold: int = typer.Option(
+        DEFAULT_THRESHOLD, help="Minimum rule score to skip the LLM."
+    ),
     json_out: bool = typer.Option(False, "--json", help="Print strict JSON only (for automation)."),
 ):
     p = Path(path).resolve()
@@ -75,7 +231,7 @@ def route(
 
     # Extract text
     print(f"[bold]Reading text[/bold] from: {p.name}")
-    text = read_text_any(str(p), max_chars=max_text_chars)
+    text = read_text_any(str(p), ocr_pages=ocr_pages, max_chars=max_text_chars)
     if len(text.strip()) < 30:
         print(
             "[yellow]Warning:[/yellow] very little text extracted (scan? quality low). Proceeding anyway."
@@ -85,62 +241,33 @@ def route(
     print("[bold]Listing OneDrive folders[/bold] (cached)…")
     folders = list_folders(use_cache=True)
 
-    # System prompt with scoring rules
-    system_prompt = """You are ARCHIVE, a pragmatic filing assistant. Given a document's extracted text and a list of OneDrive folders (relative paths), infer:
-- doc type (invoice|contract|homework|other),
-- year (int or null),
-- up to 8 keywords.
-Score folders by:
-+2 if path implies type (contains 'invoice', 'homeworks', 'tickets' etc. as path segments),
-+1 if year appears as a path segment,
-+2 per keyword overlap (cap 3).
-Return strict JSON:
-{
- "inferred": { "type": "...", "vendor": "...", "subject": "...", "year": 2025, "keywords": [] },
- "candidates": [{"path": "...", "score": 0, "why": "..."}, {"path": "...", "score": 0, "why": "..."}, {"path": "...", "score": 0, "why": "..."}],
- "chosen_folder": "..." | null,
- "proposed_filename": "YYYY-MM-DD_<type|doc>_<vendor|subject>_<orig>.ext"
-}
-If auto=false, chosen_folder must be null. Do not invent folders; use only provided list.
-If vendor or year are unknown, set them to null.
-Return candidates sorted by descending score (best first).
-"""
-
-    # Build user payload
-    user_payload = {
-        "auto": auto,
-        "original_filename": p.name,
-        "original_path": str(p),
-        "extracted_text": text,
-        "folders": folders[:500],  # cap to keep prompt size reasonable
-    }
-
-    # Call LLM
-    print("[bold]Asking the LLM for candidates…[/bold]")
-    result = call_llm(system_prompt, user_payload)
-
-    # Normalize response
-    resp = {
-        "inferred": result.get("inferred", {}) or {},
-        "candidates": result.get("candidates", []) or [],
-        "proposed_filename": result.get("proposed_filename"),
-        "chosen_folder": result.get("chosen_folder"),
-    }
-
-    # ensure scores are ints and sort descending
-    for c in resp["candidates"]:
-        try:
-            c["score"] = int(c.get("score", 0))
-        except Exception:
-            c["score"] = 0
-
-    resp["candidates"] = sorted(resp["candidates"], key=lambda x: x.get("score", 0), reverse=True)
+    # Deterministic keyword rules first; the LLM is only the fallback
+    resp = None if force_llm else try_rule_route(text, p.name, folders, rule_threshold)
+    if resp:
+        print("[bold]Matched by keyword rules[/bold] (skipping the LLM)")
+    else:
+        # Build user payload
+        (text,), packed = _pack_prompt([text], folders, prompt_budget, SYSTEM_PROMPT)
+        user_payload = {
+            "auto": auto,
+            "original_filename": p.name,
+            "original_path": str(p),
+            "extracted_text": text,
+            "folders": packed,
+        }
+
+        # Call LLM
+        print("[bold]Asking the LLM for candidates…[/bold]")
+        result = call_llm(SYSTEM_PROMPT, user_payload)
+
+        # Normalize response
+        resp = _normalize_result(result)
 
     # If just suggesting (no move), either print JSON or table
-#     if not auto and not chosen:
-#         if json_out:
-#             print(json.dumps(resp, ensure_ascii=False))
-#             return
+    if not auto and not chosen:
+        if json_out:
+            print(json.dumps(resp, ensure_ascii=False))
+            return
 
         print(
             "\n[bold]Inferred[/bold]:", json.dumps(resp["inferred"], indent=2, ensure_ascii=False)
@@ -201,5 +328,186 @@ Return candidates sorted by descending score (best first).
         print(f"[green]Done![/green] Remote path: {final_remote}")
 
 
+async def _move_all(moves: list[dict], allow_create: bool, limit: int = 8):
+    """
+    Move a batch with one rclone process per destination folder, folders running
+    concurrently (capped at `limit`). Fills in "final_remote_path" on each resp dict,
+    or "error" for each file that failed, so one bad file or group doesn't hide the rest.
+    """
+    sem = asyncio.Semaphore(limit)
+
+    async def _bounded(coro):
+        async with sem:
+            return await coro
+
+    groups: dict[str, list[dict]] = {}
+    for m in moves:
+        groups.setdefault(m["chosen_folder"], []).append(m)
+
+    if allow_create:
+        created = await asyncio.gather(
+            *[_bounded(aensure_path(f)) for f in groups], return_exceptions=True
+        )
+        for folder, res in zip(list(groups), created):
+            if isinstance(res, BaseException):
+                for m in groups.pop(folder):
+                    m["error"] = f"could not create folder: {res}"
+
+    async def _move_group(group: list[dict]):
+        items = [(m["file"], m["chosen_folder"], m["renamed"]) for m in group]
+        moved = await asyncio.to_thread(move_many_local_to_remote, items)
+        for m, (final_remote, err) in zip(group, moved):
+            if err:
+                m["error"] = err
+                continue
+            m["final_remote_path"] = final_remote
+            m["renamed"] = final_remote.rsplit("/", 1)[-1]  # may carry a dedupe suffix
+
+    group_list = list(groups.values())
+    results = await asyncio.gather(
+        *[_bounded(_move_group(g)) for g in group_list], return_exceptions=True
+    )
+    for group, res in zip(group_list, results):
+        if isinstance(res, BaseException):
+            for m in group:
+                if "final_remote_path" not in m and "error" not in m:
+                    m["error"] = str(res)
+
+
+@app.command("route-batch")
+def route_batch(
+    paths: list[str],
+    auto: bool = typer.Option(
+        False, "--auto", help="Automatically move each file to its chosen or top folder."
+    ),
+    allow_create: bool = typer.Option(
+        False, "--allow-create", help="Create missing folders if needed."
+    ),
+    batch: int = typer.Option(
+        6, "--batch", min=1, help="Documents per LLM request (accuracy drops if too large)."
+    ),
+    max_text_chars: int = typer.Option(4000, help="Truncate extracted text."),
+    ocr_pages: int = typer.Option(
+        1, min=1, help="Pages to OCR for scanned PDFs (several are OCR'd in parallel)."
+    ),
+    prompt_budget: int = typer.Option(
+        3500, help="Approximate prompt size in tokens per LLM request (shared by the batch)."
+    ),
+    force_llm: bool = typer.Option(
+        False, "--force-llm", help="Always ask the LLM, even when keyword rules are confident."
+    ),
+    rule_threshold: int = typer.Option(
+        DEFAULT_THRESHOLD, help="Minimum rule score to skip the LLM."
+    ),
+    json_out: bool = typer.Option(False, "--json", help="Print strict JSON only (for automation)."),
+):
+    """
+    Route several files, sharing one prompt (and folder list) per batch of documents.
+    """
+    # the same file given twice would be moved twice (the second move fails)
+    files = list(dict.fromkeys(Path(x).resolve() for x in paths))
+    missing = [f for f in files if not f.exists()]
+    if missing:
+        for f in missing:
+            typer.secho(f"File not found: {f}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    # Extract text (OCR/parsing is independent per file)
+    print(f"[bold]Reading text[/bold] from {len(files)} files")
+    with ThreadPoolExecutor() as ex:
+        texts = list(
+            ex.map(
+                lambda f: read_text_any(str(f), ocr_pages=ocr_pages, max_chars=max_text_chars),
+                files,
+            )
+        )
+
+    print("[bold]Listing OneDrive folders[/bold] (cached)…")
+    folders = list_folders(use_cache=True)
+
+    # Deterministic keyword rules first; only the rest go to the LLM
+    results: dict[int, dict] = {}
+    if not force_llm:
+        for i, f in enumerate(files):
+            hit = try_rule_route(texts[i], f.name, folders, rule_threshold)
+            if hit:
+                results[i] = hit
+        if results:
+            print(f"[bold]Matched by keyword rules[/bold]: {len(results)} files (skipping the LLM)")
+    pending = [i for i in range(len(files)) if i not in results]
+
+    fit = _max_batch(prompt_budget, BATCH_SYSTEM_PROMPT)
+    if batch > fit:
+        print(
+            f"[yellow]Warning:[/yellow] --batch {batch} does not fit --prompt-budget "
+            f"{prompt_budget}; sending {fit} documents per request."
+        )
+        batch = fit
+
+    for start in range(0, len(pending), batch):
+        chunk = pending[start : start + batch]
+        chunk_texts, packed = _pack_prompt(
+            [texts[i] for i in chunk], folders, prompt_budget, BATCH_SYSTEM_PROMPT
+        )
+        user_payload = {
+            "auto": auto,
+            "folders": packed,
+            "items": [
+                {"id": i, "filename": files[i].name, "text": t}
+                for i, t in zip(chunk, chunk_texts)
+            ],
+        }
+
+        print(f"[bold]Asking the LLM for candidates…[/bold] ({len(chunk)} files)")
+        result = call_llm(BATCH_SYSTEM_PROMPT, user_payload)
+        by_id = {}
+        for r in result.get("results", []) or []:
+            try:
+                by_id[int(r.get("id"))] = r
+            except (TypeError, ValueError):
+                continue
+        for i in chunk:
+            results[i] = _normalize_result(by_id.get(i, {}))
+
+    date_str = today()
+    outputs = []
+    moves = []
+    for i, p in enumerate(files):
+        resp = results[i]
+        proposed = resp["proposed_filename"] or smart_filename(resp["inferred"], p.name, date_str)
+        resp.update({"file": str(p), "renamed": proposed})
+
+        if not auto:
+            outputs.append(resp)
+            if not json_out:
+                top = resp["candidates"][0]["path"] if resp["candidates"] else "-"
+                print(f"{p.name} → {top}/{proposed}")
+            continue
+
+        dest_folder = resp["chosen_folder"]
+        if not dest_folder:
+            dest_folder = resp["candidates"][0]["path"] if resp["candidates"] else None
+        if not dest_folder:
+            typer.secho(f"No candidate folder available for {p.name}.", fg=typer.colors.RED)
+            outputs.append(resp)
+            continue
+
+        resp["chosen_folder"] = dest_folder
+        outputs.append(resp)
+        moves.append(resp)
+
+    if moves:
+        print(f"[bold]Moving[/bold] {len(moves)} files")
+        asyncio.run(_move_all(moves, allow_create))
+        for m in moves:
+            if "error" in m:
+                typer.secho(f"Failed to move {Path(m['file']).name}: {m['error']}", fg=typer.colors.RED)
+
+    if json_out:
+        print(json.dumps(outputs, ensure_ascii=False))
+    if any("error" in m for m in moves):
+        raise typer.Exit(1)
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,44 @@
+from tools.fast_router import try_rule_route
+
+FOLDERS = ["contracts", "contracts/2025", "invoices", "invoices/2025", "quantum hw"]
+
+
+def test_routes_clear_invoice():
+    resp = try_rule_route("INVOICE\nDigitec AG\nDate: 11.09.2025\nTotal CHF 120", "scan.pdf", FOLDERS)
+    assert resp is not None
+    assert resp["candidates"][0]["path"] == "invoices/2025"
+    assert resp["inferred"]["type"] == "invoice"
+    assert resp["inferred"]["year"] == 2025
+
+
+def test_type_from_filename():
+    resp = try_rule_route("Digitec AG, 2025-03-01", "2025_contract_digitec.pdf", FOLDERS)
+    assert resp is not None
+    assert resp["candidates"][0]["path"] == "contracts/2025"
+
+
+def test_mixed_types_defer_to_llm():
+    text = "EMPLOYMENT CONTRACT\nsigned 2025-01-05\nThe employee shall submit an invoice for expenses."
+    assert try_rule_route(text, "scan.pdf", FOLDERS) is None
+
+
+def test_homework_mentioning_receipt_defers_to_llm():
+    text = "Homework 3\nQuantum mechanics, due 2025-10-01\nNo receipt issued for late submissions."
+    assert try_rule_route(text, "scan.pdf", FOLDERS) is None
+
+
+def test_type_word_deep_in_body_is_ignored():
+    text = "EMPLOYMENT CONTRACT\nsigned 2025-01-05\n" + "clause text. " * 40 + "submit an invoice"
+    resp = try_rule_route(text, "scan.pdf", FOLDERS)
+    assert resp is not None
+    assert resp["candidates"][0]["path"] == "contracts/2025"
+
+
+def test_keywords_alone_do_not_skip_llm():
+    text = "Delivery note\nItems for your medical file, supplied by quantum logistics."
+    assert try_rule_route(text, "scan.pdf", FOLDERS + ["medical/quantum"]) is None
+
+
+def test_invoice_number_is_not_a_year():
+    resp = try_rule_route("Invoice INV 2031-44", "scan.pdf", FOLDERS)
+    assert resp is None or resp["inferred"]["year"] is None
@@ -0,0 +1,122 @@
+# tools/fast_router.py
+import datetime
+import re
+from pathlib import Path
+from typing import Optional
+
+from .util import folder_tokens, tokenize
+
+# doc type -> (pattern over filename/text, path tokens that imply the type)
+_TYPE_RULES = {
+    "invoice": (
+        re.compile(r"\b(invoices?|factures?|rechnung|receipt)\b", re.I),
+        {"invoice", "invoices", "facture", "factures", "receipts"},
+    ),
+    "contract": (
+        re.compile(r"\b(contracts?|agreement|contrat|vertrag)\b", re.I),
+        {"contract", "contracts", "contrats", "agreements"},
+    ),
+    "homework": (
+        re.compile(r"\b(homeworks?|assignment|problem set|exercise sheet)\b", re.I),
+        {"homework", "homeworks", "hw", "assignments"},
+    ),
+}
+# Years inside dates first (2025-09-11, 11.09.2025), then standalone 19xx/20xx not
+# glued to other digits (so "INV 2031-44" or "2025/118" is not a year)
+_YEAR_RES = (
+    re.compile(r"\b((?:19|20)\d{2})-\d{2}-\d{2}\b"),
+    re.compile(r"\b\d{1,2}[./-]\d{1,2}[./-]((?:19|20)\d{2})\b"),
+    re.compile(r"(?<![\w./-])((?:19|20)\d{2})(?![\w]|[./-]\d)"),
+)
+
+# Type and keywords only come from the filename and the document's first lines
+_HEADER_CHARS = 300
+_STOPWORDS = {
+    "the", "and", "for", "from", "with", "your", "our", "you", "are", "this", "that",
+    "les", "des", "une", "pour", "und", "der", "die", "das", "von",
+    "page", "date", "total", "number", "amount", "name", "address", "tel", "email",
+    "www", "com", "pdf", "scan", "doc", "document", "documents", "file", "files",
+    "personal", "records", "misc", "other", "new", "old", "all",
+}
+
+DEFAULT_THRESHOLD = 3  # i.e. at least two independent signals
+
+
+def _find_year(*sources: str) -> Optional[str]:
+    latest = datetime.date.today().year + 1
+    for src in sources:
+        for pat in _YEAR_RES:
+            for m in pat.finditer(src):
+                if 1990 <= int(m.group(1)) <= latest:
+                    return m.group(1)
+    return None
+
+
+def try_rule_route(
+    text: str, filename: str, folders: list[str], threshold: int = DEFAULT_THRESHOLD
+) -> Optional[dict]:
+    """
+    Score folders with the same rubric the LLM prompt uses (+2 type hint in path,
+    +1 year segment, +2 per keyword overlap, cap 3) and return a response dict
+    shaped like the normalised LLM result when the best folder scores at least
+    `threshold` and strictly beats the runner-up. Otherwise None (ask the LLM).
+    Type and keywords come from the filename and the first _HEADER_CHARS of text
+    (keywords minus stopwords); if several types match, the LLM decides. Keyword
+    overlap alone never qualifies: the winner also needs the type or year.
+    """
+    # "_" is a word char, so split snake_case filenames before tokenising
+    stem = Path(filename).stem.replace("_", " ")
+    header = f"{stem} {text[:_HEADER_CHARS]}"
+    types = [t for t, (pat, _) in _TYPE_RULES.items() if pat.search(header)]
+    if len(types) > 1:  # e.g. a contract that mentions invoices: let the LLM decide
+        return None
+    doc_type = types[0] if types else None
+    hints = _TYPE_RULES[doc_type][1] if doc_type else set()
+    year = _find_year(stem, text[:2000])
+    words = {
+        w
+        for w in tokenize(header)
+        if len(w) > 2 and not w.isdigit() and w not in _STOPWORDS
+    } - hints
+
+    scored = []
+    for folder in folders:
+        ftoks = folder_tokens(folder)
+        why = []
+        score = 0
+        strong = False
+        if hints & ftoks:
+            score += 2
+            strong = True
+            why.append(f"type:{doc_type}")
+        if year and year in ftoks:
+            score += 1
+            strong = True
+            why.append(f"year:{year}")
+        overlap = sorted(words & ftoks)[:3]
+        if overlap:
+            score += 2 * len(overlap)
+            why.append("keywords:" + ",".join(overlap))
+        if score:
+            scored.append(
+                {"path": folder, "score": score, "why": "; ".join(why), "_strong": strong}
+            )
+
+    scored.sort(key=lambda c: c["score"], reverse=True)
+    if not scored or scored[0]["score"] < threshold or not scored[0]["_strong"]:
+        return None
+    if len(scored) > 1 and scored[1]["score"] == scored[0]["score"]:
+        return None
+
+    return {
+        "inferred": {
+            "type": doc_type or "other",
+            "vendor": None,
+            "subject": None,
+            "year": int(year) if year else None,
+            "keywords": sorted(words & folder_tokens(scored[0]["path"])),
+        },
+        "candidates": [{k: c[k] for k in ("path", "score", "why")} for c in scored[:3]],
+        "proposed_filename": None,
+        "chosen_folder": None,
+    }
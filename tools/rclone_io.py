@@ -1,20 +1,34 @@
 # tools/rclone_io.py
-import json, os, subprocess, time
+import asyncio, functools, json, os, pickle, shutil, subprocess, tempfile, time, warnings
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv   
 load_dotenv()                       
 
 REMOTE = os.getenv("ONEDRIVE_REMOTE", "onedrv:")
 ROOT = os.getenv("ROOT_PATH", "")
 
-CACHE = Path("data/cache/folders.json")
+CACHE = Path("data/cache/folders.pkl")  # pickled, deduped + sorted folder paths
 CACHE_TTL = 600  # seconds
 
+def _loop_running() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
 def _run(cmd: list[str]) -> str:
     """
     Run an rclone command and return stdout text.
+    Blocking: async callers (e.g. MCP handlers) should use _arun / the a* helpers.
     """
+    if _loop_running():
+        warnings.warn(
+            f"blocking rclone call inside a running event loop: {' '.join(cmd)}",
+            RuntimeWarning,
+            stacklevel=3,
+        )
     res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     if res.returncode != 0:
         raise RuntimeError(
@@ -22,25 +36,63 @@ def _run(cmd: list[str]) -> str:
         )
     return res.stdout.decode(errors="ignore")
 
-def list_folders(use_cache: bool = True) -> List[str]:
+async def _arun(cmd: list[str]) -> str:
     """
-    List all OneDrive folders.
+    Async variant of _run: lets several rclone calls overlap their network round trips.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    out, err = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"Command failed: {' '.join(cmd)}\n{err.decode(errors='ignore')}"
+        )
+    return out.decode(errors="ignore")
+
+@functools.lru_cache(maxsize=1)
+def _load_cache(mtime_ns: int) -> tuple[str, ...]:
+    """
+    Unpickle the folder cache; keyed by mtime so a rewritten file is picked up.
+    """
+    return pickle.loads(CACHE.read_bytes())
+
+_LSJSON_CMD = ["rclone", "lsjson", f"{REMOTE}{ROOT}", "--dirs-only", "--recursive"]
+
+def _cached_folders() -> List[str] | None:
+    """
+    Folder list from the cache, or None if it is missing or older than CACHE_TTL.
     """
-    if use_cache and CACHE.exists() and (time.time() - CACHE.stat().st_mtime) < CACHE_TTL:
-        data = json.loads(CACHE.read_text())
-    else:
-        cmd = ["rclone", "lsjson", f"{REMOTE}{ROOT}", "--dirs-only", "--recursive"]
-        out = _run(cmd)
-        data = json.loads(out) if out.strip() else []
-        CACHE.parent.mkdir(parents=True, exist_ok=True)
-        CACHE.write_text(json.dumps(data))
+    if CACHE.exists():
+        st = CACHE.stat()
+        if (time.time() - st.st_mtime) < CACHE_TTL:
+            return list(_load_cache(st.st_mtime_ns))
+    return None
 
-    paths = []
+def _store_folders(out: str) -> List[str]:
+    """
+    Parse `rclone lsjson` output into sorted unique paths and refresh the cache.
+    """
+    data = json.loads(out) if out.strip() else []
+
+    seen = {}
     for obj in data:
         rel = obj.get("Path") or obj.get("Name")
-        if rel:
-            paths.append(rel)
-    return sorted(set(paths))
+        if rel and rel not in seen:
+            seen[rel] = None
+    paths = sorted(seen)
+
+    CACHE.parent.mkdir(parents=True, exist_ok=True)
+    CACHE.write_bytes(pickle.dumps(tuple(paths), protocol=pickle.HIGHEST_PROTOCOL))
+    return paths
+
+def list_folders(use_cache: bool = True) -> List[str]:
+    """
+    List all OneDrive folders.
+    """
+    if use_cache and (paths := _cached_folders()) is not None:
+        return paths
+    return _store_folders(_run(_LSJSON_CMD))
 
 def ensure_path(rel_path: str):
     """
@@ -55,3 +107,131 @@ def move_local_to_remote(local_path: str, dest_rel_path: str, dest_filename: str
     dst = f"{REMOTE}{ROOT}{dest_rel_path}/{dest_filename}"
     _run(["rclone", "moveto", local_path, dst])
     return dst
+
+def _dedupe_names(items: list[tuple[str, str, str]]) -> list[tuple[str, str, str]]:
+    """
+    Suffix repeated filenames within a destination folder ("a.pdf", "a_2.pdf", …)
+    so no item in a batch overwrites another on the remote.
+    """
+    seen: dict[str, set[str]] = {}
+    out = []
+    for local, dest, name in items:
+        taken = seen.setdefault(dest, set())
+        stem, ext = os.path.splitext(name)
+        k = 2
+        while name in taken:
+            name = f"{stem}_{k}{ext}"
+            k += 1
+        taken.add(name)
+        out.append((local, dest, name))
+    return out
+
+def _try_move(item: tuple[str, str, str]) -> Optional[str]:
+    """
+    moveto one (local_path, dest_rel_path, dest_filename) item; returns the error or None.
+    """
+    try:
+        move_local_to_remote(*item)
+    except (RuntimeError, OSError) as e:
+        return str(e)
+    return None
+
+def _move_group(dest_rel_path: str, items: list[tuple[str, str, str]]) -> dict[str, Optional[str]]:
+    """
+    Move files that share a destination folder with a single `rclone move --files-from-raw`.
+    Files are hardlinked under their new names into a staging dir next to the first source;
+    anything that can't be staged (other filesystem, odd name) or that rclone didn't pick
+    up goes through moveto. Names must already be unique (see _dedupe_names).
+    Returns {dest_filename: error or None}; a failed rclone run doesn't abort the group.
+    """
+    try:
+        staging = Path(
+            tempfile.mkdtemp(prefix=".archive-", dir=Path(items[0][0]).resolve().parent)
+        )
+    except OSError:  # e.g. read-only source dir
+        return {item[2]: _try_move(item) for item in items}
+
+    errors: dict[str, Optional[str]] = {}
+    staged, single = [], []
+    try:
+        for local, dest, name in items:
+            try:
+                if "\n" in name:
+                    raise OSError("newline in filename")
+                os.link(local, staging / name)
+                staged.append((local, dest, name))
+            except OSError:
+                single.append((local, dest, name))
+
+        if staged:
+            list_path = staging.with_suffix(".files")
+            try:
+                list_path.write_text("".join(f"{name}\n" for _, _, name in staged))
+                _run([
+                    "rclone", "move", "--files-from-raw", str(list_path),
+                    str(staging), f"{REMOTE}{ROOT}{dest_rel_path}",
+                ])
+            except (RuntimeError, OSError):
+                pass  # whatever rclone left behind is retried one by one below
+            list_path.unlink(missing_ok=True)
+            # only a staged link that rclone removed was uploaded; drop its original too
+            for local, dest, name in staged:
+                if (staging / name).exists():
+                    single.append((local, dest, name))
+                    continue
+                try:
+                    os.unlink(local)
+                    errors[name] = None
+                except OSError as e:
+                    errors[name] = f"uploaded, but could not remove {local}: {e}"
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    for item in single:
+        errors[item[2]] = _try_move(item)
+    return errors
+
+def move_many_local_to_remote(
+    items: list[tuple[str, str, str]],
+) -> list[tuple[str, Optional[str]]]:
+    """
+    Move several (local_path, dest_rel_path, dest_filename) items, using one rclone
+    process per destination folder. Filenames repeated within a folder get a numeric
+    suffix. Returns (remote_path, error or None) per item, in input order; a failure
+    only marks the files it affected.
+    """
+    items = _dedupe_names(items)
+    groups: dict[str, list[tuple[str, str, str]]] = {}
+    for item in items:
+        groups.setdefault(item[1], []).append(item)
+    errors: dict[tuple[str, str], Optional[str]] = {}
+    for dest, group in groups.items():
+        if len(group) == 1:
+            errors[dest, group[0][2]] = _try_move(group[0])
+        else:
+            for name, err in _move_group(dest, group).items():
+                errors[dest, name] = err
+
+    return [(f"{REMOTE}{ROOT}{dest}/{name}", errors[dest, name]) for _, dest, name in items]
+
+async def alist_folders(use_cache: bool = True) -> List[str]:
+    """
+    Async version of list_folders.
+    """
+    if use_cache and (paths := _cached_folders()) is not None:
+        return paths
+    return _store_folders(await _arun(_LSJSON_CMD))
+
+async def aensure_path(rel_path: str):
+    """
+    Async version of ensure_path.
+    """
+    await _arun(["rclone", "mkdir", f"{REMOTE}{ROOT}{rel_path}"])
+
+async def amove_local_to_remote(local_path: str, dest_rel_path: str, dest_filename: str):
+    """
+    Async version of move_local_to_remote.
+    """
+    dst = f"{REMOTE}{ROOT}{dest_rel_path}/{dest_filename}"
+    await _arun(["rclone", "moveto", local_path, dst])
+    return dst
@@ -1,19 +1,65 @@
 import asyncio
 import logging
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
+from functools import partial
 from typing import Any, Generic, TypedDict, TypeVar
 
+import rclone_rc
 from mcp.server.fastmcp import Context, FastMCP
 from util import get_logger
 
 logger = get_logger("mcp_logs")
 
-rclone_mcp = FastMCP("rclone")
+
+@asynccontextmanager
+async def _rcd_lifespan(server: FastMCP):
+    """
+    Keep the shared `rclone rcd` daemon alive while any session is open so tools
+    skip rclone startup/auth per call. Tools fall back to subprocesses if it is down.
+    """
+    if not await rclone_rc.acquire_daemon():
+        logger.error("could not start rclone rcd; using one rclone process per call")
+    try:
+        yield
+    finally:
+        await rclone_rc.release_daemon()
+
+
+rclone_mcp = FastMCP("rclone", lifespan=_rcd_lifespan)
+
+# Shared pool for rclone subprocesses; avoids asyncio child-watcher setup per call
+_EX = ThreadPoolExecutor(max_workers=16)
+
+# "Total:   1 TiB" -> "1 TiB"; one match per line of `rclone about`
+_ABOUT_RE = re.compile(r"^\S+:\s*(.+)$", re.M)
 
 
 T = TypeVar("T")
 
 
+async def _exec(*cmd: str) -> tuple[int, bytes, bytes]:
+    """
+    Run a command on the shared worker pool without blocking the event loop.
+
+    Returns:
+        (returncode, stdout, stderr)
+    """
+    res = await asyncio.get_running_loop().run_in_executor(
+        _EX, partial(subprocess.run, cmd, capture_output=True, check=False)
+    )
+    return res.returncode, res.stdout, res.stderr
+
+
+async def _rc_failed(ctx: Context, e: RuntimeError) -> "ResultWrapper[None]":
+    logger.error(str(e))
+    await ctx.error(str(e))
+    return ResultWrapper(False, None)
+
+
 @dataclass
 class ResultWrapper(Generic[T]):
     """
@@ -51,20 +97,23 @@ async def listremotes(ctx: Context) -> ResultWrapper[list[str] | None]:
             - success=True and a list of remote names if the command succeeds.
             - success=False and None if the command fails.
     """
+    try:
+        remotes = await rclone_rc.listremotes()
+    except RuntimeError as e:
+        return await _rc_failed(ctx, e)
+    if remotes is not None:
+        return ResultWrapper(True, remotes)
 
-    process = await asyncio.create_subprocess_exec(
-        "rclone", "listremotes", stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-    )
-
-    out, err = await process.communicate()
+    # daemon unavailable: fall back to spawning rclone
+    returncode, out, err = await _exec("rclone", "listremotes")
 
     if err:
         logger.error(err.decode().strip())
-        await ctx.error(err.decode.strip())
+        await ctx.error(err.decode().strip())
 
-    if process.returncode != 0:
-        logger.error(f"rclone listremotes failed with code {process.returncode}")
-        await ctx.error(f"rclone listremotes failed with code {process.returncode}")
+    if returncode != 0:
+        logger.error(f"rclone listremotes failed with code {returncode}")
+        await ctx.error(f"rclone listremotes failed with code {returncode}")
         return ResultWrapper(False, None)
 
     return ResultWrapper(True, [line.strip() for line in out.decode().splitlines() if line.strip()])
@@ -85,23 +134,23 @@ async def lsf(remote: str, path: str, ctx: Context) -> ResultWrapper[list[str] |
             - success=True and a list of filenames/directories in the specified path if successful.
             - success=False and None if the command fails.
     """
-    process = await asyncio.create_subprocess_exec(
-        "rclone",
-        "lsf",
-        f"{remote}{path}",
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
+    try:
+        entries = await rclone_rc.lsf(remote, path)
+    except RuntimeError as e:
+        return await _rc_failed(ctx, e)
+    if entries is not None:
+        return ResultWrapper(True, entries)
 
-    out, err = await process.communicate()
+    # daemon unavailable: fall back to spawning rclone
+    returncode, out, err = await _exec("rclone", "lsf", f"{remote}{path}")
 
     if err:
         logger.error(err.decode().strip())
         await ctx.error(err.decode().strip())
 
-    if process.returncode != 0:
-        logger.error(f"rclone lsf failed with code {process.returncode}")
-        await ctx.error(f"rclone lsf failed with code {process.returncode}")
+    if returncode != 0:
+        logger.error(f"rclone lsf failed with code {returncode}")
+        await ctx.error(f"rclone lsf failed with code {returncode}")
         return ResultWrapper(False, None)
 
     return ResultWrapper(True, out.decode().splitlines())
@@ -121,29 +170,32 @@ async def about(remote: str, ctx: Context) -> ResultWrapper[AboutReturn | None]:
             - success=True and an AboutReturn object containing total, used, free, and trashed storage.
             - success=False and None if the command fails.
     """
-    process = await asyncio.create_subprocess_exec(
-        "rclone",
-        "about",
-        f"{remote}",
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
+    try:
+        values = await rclone_rc.about(remote)
+    except RuntimeError as e:
+        return await _rc_failed(ctx, e)
+    if values is not None:
+        return ResultWrapper(True, AboutReturn(*values))
 
-    out, err = await process.communicate()
+    # daemon unavailable: fall back to spawning rclone
+    returncode, out, err = await _exec("rclone", "about", f"{remote}")
 
     if err:
         logger.error(err.decode().strip())
         await ctx.error(err.decode().strip())
 
-    if process.returncode != 0:
-        logger.error(f"rclone about failed with code {process.returncode}")
-        await ctx.error(f"rclone about failed with code {process.returncode}")
+    if returncode != 0:
+        logger.error(f"rclone about failed with code {returncode}")
+        await ctx.error(f"rclone about failed with code {returncode}")
         return ResultWrapper(False, None)
 
-    out_result = out.decode().splitlines()
-    values = [" ".join(x[1:]) for x in (j.split() for j in out_result)]
+    values = _ABOUT_RE.findall(out.decode())
+    if len(values) != 4:
+        logger.error(f"unexpected rclone about output: {out.decode().strip()}")
+        await ctx.error("unexpected rclone about output")
+        return ResultWrapper(False, None)
 
-    return ResultWrapper(True, AboutReturn(*values))
+    return ResultWrapper(True, AboutReturn(*[v.strip() for v in values]))
 
 
 @rclone_mcp.tool()
@@ -162,24 +214,23 @@ async def copy(remote: str, local_path: str, remote_path: str, ctx: Context) ->
             - success=True and None if the file/directory was copied successfully.
             - success=False and None if the copy operation failed.
     """
-    process = await asyncio.create_subprocess_exec(
-        "rclone",
-        "copy",
-        f"{local_path}",
-        f"{remote}{remote_path}",
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
+    try:
+        copied = await rclone_rc.copy(remote, local_path, remote_path)
+    except RuntimeError as e:
+        return await _rc_failed(ctx, e)
+    if copied is not None:
+        return ResultWrapper(True, None)
 
-    out, err = await process.communicate()
+    # daemon unavailable: fall back to spawning rclone
+    returncode, out, err = await _exec("rclone", "copy", f"{local_path}", f"{remote}{remote_path}")
 
     if err:
         logger.error(err.decode().strip())
         await ctx.error(err.decode().strip())
 
-    if process.returncode != 0:
-        logger.error(f"rclone copy failed with code {process.returncode}")
-        await ctx.error(f"rclone copy failed with code {process.returncode}")
+    if returncode != 0:
+        logger.error(f"rclone copy failed with code {returncode}")
+        await ctx.error(f"rclone copy failed with code {returncode}")
         return ResultWrapper(False, None)
 
     return ResultWrapper(True, None)
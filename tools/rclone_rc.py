@@ -0,0 +1,177 @@
+# tools/rclone_rc.py
+import asyncio
+import os
+import secrets
+from pathlib import Path
+
+import httpx
+
+RC_ADDR = os.getenv("RCLONE_RC_ADDR", "127.0.0.1:5572")
+
+# Per-process credentials so other local users can't drive our daemon
+_USER = "archive"
+_PASS = secrets.token_urlsafe(16)
+
+# One daemon + client per process, shared by every MCP session (the lifespan
+# runs once per connection on SSE/streamable-HTTP); refcounted by acquire/release
+_CLIENT: httpx.AsyncClient | None = None
+_PROC: asyncio.subprocess.Process | None = None
+_USERS = 0
+_LOCK = asyncio.Lock()
+
+
+async def rc(command: str, **params) -> dict | None:
+    """
+    Call an rclone rc endpoint (e.g. "operations/list") on the shared daemon.
+
+    Returns:
+        The decoded JSON reply, or None if the daemon is not reachable (callers
+        fall back to spawning rclone).
+
+    Raises:
+        RuntimeError: if the daemon reports an error for the command.
+    """
+    client = _CLIENT
+    if client is None or client.is_closed:
+        return None
+    try:
+        r = await client.post(f"/{command}", json=params)
+    except (httpx.TransportError, RuntimeError):  # RuntimeError: closed under us
+        return None
+    if r.status_code in (401, 403):  # someone else's daemon on our port
+        return None
+    if r.status_code != 200:
+        raise RuntimeError(f"rclone rc {command} failed: {r.text.strip()}")
+    return r.json()
+
+
+def _size(n: int | None) -> str:
+    """
+    Format a byte count the way `rclone about` prints it (e.g. "1.005 TiB").
+    """
+    if n is None:
+        return ""
+    x = float(n)
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(x) < 1024:
+            break
+        x /= 1024
+    else:
+        unit = "PiB"
+    return f"{x:.3f}".rstrip("0").rstrip(".") + f" {unit}"
+
+
+async def listremotes() -> list[str] | None:
+    """
+    Configured remotes, with the trailing ":" like `rclone listremotes`.
+    """
+    data = await rc("config/listremotes")
+    if data is None:
+        return None
+    return [f"{r}:" for r in data.get("remotes") or []]
+
+
+async def lsf(remote: str, path: str) -> list[str] | None:
+    """
+    Entries under remote+path, directories suffixed with "/" like `rclone lsf`.
+    """
+    data = await rc("operations/list", fs=remote, remote=path.strip("/"))
+    if data is None:
+        return None
+    return [e["Name"] + ("/" if e.get("IsDir") else "") for e in data.get("list") or []]
+
+
+async def about(remote: str) -> tuple[str, str, str, str] | None:
+    """
+    (total, used, free, trashed) for a remote, formatted like `rclone about`.
+    """
+    data = await rc("operations/about", fs=remote)
+    if data is None:
+        return None
+    return tuple(_size(data.get(k)) for k in ("total", "used", "free", "trashed"))
+
+
+async def copy(remote: str, local_path: str, remote_path: str) -> bool | None:
+    """
+    Copy a local file or directory into remote+remote_path, like `rclone copy`.
+    """
+    src = Path(local_path).resolve()
+    dst = remote_path.strip("/")
+    if src.is_file():
+        data = await rc(
+            "operations/copyfile",
+            srcFs=str(src.parent),
+            srcRemote=src.name,
+            dstFs=remote,
+            dstRemote=f"{dst}/{src.name}" if dst else src.name,
+        )
+    else:
+        data = await rc("sync/copy", srcFs=str(src), dstFs=f"{remote}{dst}")
+    return None if data is None else True
+
+
+async def _start_daemon(wait: float = 5.0) -> asyncio.subprocess.Process | None:
+    """
+    Launch `rclone rcd` and wait until it answers. Returns the process handle,
+    or None if rclone could not be started.
+    """
+    env = {**os.environ, "RCLONE_RC_USER": _USER, "RCLONE_RC_PASS": _PASS}
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "rclone",
+            "rcd",
+            f"--rc-addr={RC_ADDR}",
+            env=env,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+
+    deadline = asyncio.get_running_loop().time() + wait
+    while asyncio.get_running_loop().time() < deadline and proc.returncode is None:
+        if await rc("rc/noop") is not None:
+            break
+        await asyncio.sleep(0.1)
+    return proc
+
+
+async def acquire_daemon() -> bool:
+    """
+    Register a user of the shared daemon, starting it (and the HTTP client) on
+    first use. Returns False if rclone could not be started.
+    """
+    global _CLIENT, _PROC, _USERS
+    async with _LOCK:
+        _USERS += 1
+        if _USERS == 1:
+            _CLIENT = httpx.AsyncClient(
+                base_url=f"http://{RC_ADDR}",
+                auth=(_USER, _PASS),
+                timeout=httpx.Timeout(None, connect=1.0),  # transfers take as long as they take
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            )
+            _PROC = await _start_daemon()
+        return _PROC is not None and _PROC.returncode is None
+
+
+async def release_daemon():
+    """
+    Drop a user of the shared daemon; the last one stops it and closes the client.
+    """
+    global _CLIENT, _PROC, _USERS
+    async with _LOCK:
+        _USERS -= 1
+        if _USERS > 0:
+            return
+        client, proc = _CLIENT, _PROC
+        _CLIENT, _PROC = None, None
+        if client is not None:
+            await client.aclose()
+        if proc is None or proc.returncode is not None:
+            return
+        proc.terminate()
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            proc.kill()
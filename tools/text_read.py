@@ -1,59 +1,160 @@
 # tools/text_read.py
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 from pathlib import Path
-import io
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
 import fitz  # PyMuPDF
 from PIL import Image
 import pytesseract
 
-def _pdf_text_pymupdf(path: str, max_pages: int | None = None) -> str:
+TEXT_CACHE = Path("data/cache/text")  # extracted text, keyed by _cache_key
+
+_OCR_POOL: ProcessPoolExecutor | None = None
+_OCR_POOL_LOCK = threading.Lock()
+
+def _ocr_pool() -> ProcessPoolExecutor | None:
+    """
+    One process pool (cpu_count workers) shared by every caller, so concurrent
+    read_text_any calls from threads don't each spawn their own. Uses forkserver:
+    forking a multi-threaded process can deadlock. None where that isn't available
+    (e.g. Windows), in which case callers OCR in-process.
+    """
+    global _OCR_POOL
+    with _OCR_POOL_LOCK:
+        if _OCR_POOL is None:
+            try:
+                _OCR_POOL = ProcessPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+            except (ValueError, OSError):
+                return None
+        return _OCR_POOL
+
+def _drop_ocr_pool(pool: ProcessPoolExecutor):
+    """
+    Forget a broken pool (a worker died) so the next caller starts a fresh one.
     """
-    Extract selectable text from PDF via PyMuPDF.
+    global _OCR_POOL
+    with _OCR_POOL_LOCK:
+        if _OCR_POOL is pool:
+            _OCR_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _pdf_text_from_doc(doc, max_chars: int | None = 4000, max_pages: int | None = None) -> str:
+    """
+    Extract selectable text from an open PyMuPDF document.
     Falls back to OCR only if almost nothing is found.
+    Stops reading pages once max_chars have been collected.
     """
     txt_parts = []
-    doc = fitz.open(path)
+    total = 0
     pages = range(len(doc)) if max_pages is None else range(min(max_pages, len(doc)))
     for i in pages:
         page = doc.load_page(i)
         # "text" is plain text extraction; "blocks" or "rawdict" if you need structure later
-        txt_parts.append(page.get_text("text") or "")
-    doc.close()
+        part = page.get_text("text") or ""
+        txt_parts.append(part)
+        total += len(part.strip())
+        if max_chars is not None and total >= max_chars:
+            break
     return "\n".join(txt_parts).strip()
 
-def _ocr_first_pages_with_pymupdf(pdf_path: str, pages: int = 1, dpi: int = 200) -> str:
+def _ocr_page(page, dpi: int = 200) -> str:
+    """
+    Render a loaded page to an image and OCR it.
+    """
+    pix = page.get_pixmap(dpi=dpi)
+    # build the image straight from the raw samples (no PNG encode/decode round trip)
+    mode = "RGBA" if pix.alpha else "RGB"
+    img = Image.frombytes(mode, (pix.width, pix.height), pix.samples).convert("L")
+    return pytesseract.image_to_string(img)
+
+def _ocr_one_page(pdf_path: str, page_idx: int, dpi: int = 200) -> str:
+    """
+    Open the PDF and OCR one page; picklable entry point for worker processes.
+    """
+    with fitz.open(pdf_path, filetype="pdf") as doc:
+        return _ocr_page(doc.load_page(page_idx), dpi=dpi)
+
+def _ocr_from_doc(doc, pages: int = 1, dpi: int = 200) -> str:
     """
-    Render first N pages to images and OCR with Tesseract.
+    Render first N pages of an open document to images and OCR with Tesseract.
+    Several pages are OCR'd in the shared worker pool (each worker reopens doc.name),
+    or in-process if the pool is unavailable or broken.
     """
     try:
-        doc = fitz.open(pdf_path)
-        texts = []
-        for i in range(min(pages, len(doc))):
-            page = doc.load_page(i)
-            pix = page.get_pixmap(dpi=dpi)
-            img = Image.open(io.BytesIO(pix.tobytes("png")))
-            texts.append(pytesseract.image_to_string(img))
-        doc.close()
-        return "\n".join(texts)
+        n = min(pages, len(doc))
+        pool = _ocr_pool() if n > 1 else None  # one page isn't worth a pool
+        if pool is not None:
+            try:
+                return "\n".join(pool.map(partial(_ocr_one_page, doc.name, dpi=dpi), range(n)))
+            except BrokenProcessPool:
+                _drop_ocr_pool(pool)
+        return "\n".join(_ocr_page(doc.load_page(i), dpi=dpi) for i in range(n))
     except Exception:
         return ""
 
+def _cache_key(p: Path, ocr_pages: int) -> str:
+    """
+    Key on path + mtime + size so an edited/replaced file is re-read.
+    """
+    st = p.stat()
+    raw = f"{p.resolve()}:{st.st_mtime_ns}:{st.st_size}:{ocr_pages}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
 def read_text_any(path: str, ocr_pages: int = 1, max_chars: int = 4000) -> str:
     """
     - PDFs: try PyMuPDF text; if too little, OCR first page(s).
     - Images: OCR directly.
     - Other files: read as UTF-8 best-effort.
+    Results are cached under data/cache/text/ so re-runs skip parsing/OCR.
     """
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(path)
 
+    entry = TEXT_CACHE / f"{_cache_key(p, ocr_pages)}.json"
+    try:
+        cached = json.loads(entry.read_text(encoding="utf-8"))
+        # "cap" is the max_chars a PDF was extracted with (None = full text)
+        if cached["cap"] is None or cached["cap"] >= max_chars:
+            return cached["text"][:max_chars]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    text, cap = _extract_text(p, ocr_pages, max_chars)
+    if text:
+        try:
+            TEXT_CACHE.mkdir(parents=True, exist_ok=True)
+            entry.write_text(json.dumps({"cap": cap, "text": text}), encoding="utf-8")
+        except OSError:
+            pass
+
+    return text[:max_chars]
+
+def _extract_text(p: Path, ocr_pages: int, max_chars: int) -> tuple[str, int | None]:
+    """
+    Untruncated text for p, plus the max_chars it was capped at (PDF text
+    extraction stops early) or None if it is the whole text.
+    """
     ext = p.suffix.lower()
+    cap = None
     text = ""
 
     if ext == ".pdf":
-        text = _pdf_text_pymupdf(str(p))
-        if len(text) < 50:  # likely a scan → OCR first N pages
-            text = _ocr_first_pages_with_pymupdf(str(p), pages=ocr_pages)
+        # one open/parse of the PDF shared by text extraction and the OCR fallback
+        with fitz.open(str(p), filetype="pdf") as doc:
+            text = _pdf_text_from_doc(doc, max_chars=max_chars)
+            cap = max_chars
+            if len(text) < 50:  # likely a scan → OCR first N pages
+                text = _ocr_from_doc(doc, pages=ocr_pages)
+                cap = None
     elif ext in [".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp"]:
         text = pytesseract.image_to_string(Image.open(p))
     else:
@@ -62,4 +163,4 @@ def read_text_any(path: str, ocr_pages: int = 1, max_chars: int = 4000) -> str:
         except Exception:
             text = ""
 
-    return (text or "")[:max_chars]
+    return text or "", cap
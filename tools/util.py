@@ -1,6 +1,8 @@
 # tools/util.py
 import datetime
+import functools
 import logging
+import logging.handlers
 import os
 import re
 from pathlib import Path
@@ -11,6 +13,18 @@ from unidecode import unidecode
 # Load environment variables from .env
 load_dotenv()
 
+_SLUG_STRIP = re.compile(r"[^\w\s.-]")  # keep letters, numbers, _, ., -
+_SLUG_WS = re.compile(r"\s+")
+
+# Read once at import; .env is already loaded above
+_DATE_FMT = os.getenv("DATE_FMT", "%Y-%m-%d")
+
+
+@functools.lru_cache(maxsize=4096)
+def _udec(text: str) -> str:
+    # vendors/subjects repeat across a batch; unidecode is a per-char Python mapper
+    return unidecode(text)
+
 
 def slugify(text: str, maxlen: int = 80) -> str:
     """
@@ -20,19 +34,51 @@ def slugify(text: str, maxlen: int = 80) -> str:
     """
     if not text:
         return ""
-    text = unidecode(text)  # remove accents, normalise
-    text = re.sub(r"[^\w\s.-]", "", text).strip().lower()  # keep letters, numbers, _, ., -
-    text = re.sub(r"[\s]+", "_", text)  # spaces -> underscores
+    if not text.isascii():
+        text = _udec(text)  # remove accents, normalise
+    text = _SLUG_STRIP.sub("", text).strip().lower()
+    text = _SLUG_WS.sub("_", text)  # spaces -> underscores
     return text[:maxlen].strip("_")
 
 
+def tokenize(text: str) -> set[str]:
+    """
+    Lower-cased word tokens (2+ chars) used for cheap keyword overlap scoring.
+    """
+    return {w for w in re.findall(r"\w+", text.lower()) if len(w) > 1}
+
+
+@functools.lru_cache(maxsize=None)
+def folder_tokens(folder: str) -> frozenset[str]:
+    """
+    Cached tokenize() of a folder path; folder lists are reused across documents.
+    """
+    return frozenset(tokenize(folder))
+
+
+def rank_folders(text: str, folders: list[str], k: int = 50, scan_chars: int = 2000) -> list[str]:
+    """
+    Return the top-k folders by token overlap with the first `scan_chars` of text.
+    Ties keep the incoming (sorted) order.
+    """
+    words = tokenize(text[:scan_chars])
+    scored = [(len(words & folder_tokens(f)), i) for i, f in enumerate(folders)]
+    scored.sort(key=lambda x: (-x[0], x[1]))
+    return [folders[i] for _, i in scored[:k]]
+
+
 def today(fmt_env_var="DATE_FMT") -> str:
     """
     Return today’s date formatted according to DATE_FMT in .env,
     or default to YYYY-MM-DD.
     """
-    fmt = os.getenv(fmt_env_var, "%Y-%m-%d")
-    return datetime.date.today().strftime(fmt)
+    fmt = _DATE_FMT if fmt_env_var == "DATE_FMT" else os.getenv(fmt_env_var, "%Y-%m-%d")
+    return _format_day(datetime.date.today().toordinal(), fmt)
+
+
+@functools.lru_cache(maxsize=8)
+def _format_day(ordinal: int, fmt: str) -> str:
+    return datetime.date.fromordinal(ordinal).strftime(fmt)
 
 
 def _create_log_path(path: Path):
@@ -40,14 +86,19 @@ def _create_log_path(path: Path):
         path.mkdir(parents=True, exist_ok=True)
 
 
+@functools.lru_cache(maxsize=None)
 def get_logger(name: str):
     logger = logging.getLogger(name)
+    if logger.handlers:  # already configured
+        return logger
     logger.setLevel(logging.DEBUG)
 
-    # create file handler which logs even debug messages
+    # create file handler which logs even debug messages (rotated at 5 MB, 3 backups)
     fname = Path("logs") / f"{name}.log"
     _create_log_path(fname.parent)
-    fh = logging.FileHandler(filename=fname)
+    fh = logging.handlers.RotatingFileHandler(
+        filename=fname, maxBytes=5 * 1024 * 1024, backupCount=3
+    )
     fh.setLevel(logging.DEBUG)
 
     # create formatter and add it to the handlers
@@ -56,4 +107,5 @@ def get_logger(name: str):
 
     # add the handlers to the logger
     logger.addHandler(fh)
+    logger.propagate = False
     return logger